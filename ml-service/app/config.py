@@ -2,9 +2,12 @@
 Configuration management
 Uses pydantic-settings for environment variable handling
 """
+import os
+from functools import lru_cache
+from pydantic import Field
 from pydantic_settings import BaseSettings
-from typing import Dict
-import json
+from types import MappingProxyType
+from typing import ClassVar, Mapping
 
 
 class Settings(BaseSettings):
@@ -13,21 +16,33 @@ class Settings(BaseSettings):
     PORT: int = 8000
     HOST: str = "0.0.0.0"
     LOG_LEVEL: str = "info"
+    THREAD_POOL_SIZE: int = 200
+    # Server processes; defaults to WEB_CONCURRENCY, else one per core (run.py uses 1 when reloading)
+    WORKERS: int = Field(default_factory=lambda: int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
     
     MODEL_VERSION: str = "v1.0"
     MIN_TRANSACTIONS_FOR_FORECAST: int = 30
     MIN_TRANSACTIONS_FOR_HEALTH_SCORE: int = 30
     LOOKBACK_DAYS: int = 90
     
-    FORECAST_HORIZONS: Dict[str, int] = {
+    CATEGORY_BATCH_SIZE: int = 64
+    CATEGORY_BATCH_MAX_WAIT: float = 0.008
+    
+    FORECAST_HORIZONS: ClassVar[Mapping[str, int]] = MappingProxyType({
         "7day": 7,
         "14day": 14,
         "30day": 30
-    }
+    })
     
     class Config:
         env_file = ".env"
         case_sensitive = False
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, loading them on first use"""
+    return Settings()
+
+
+settings = get_settings()
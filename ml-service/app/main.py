@@ -2,24 +2,45 @@
 Main FastAPI application
 Entry point for the ML service
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Response
+from anyio import to_thread
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.routers import category, health, forecast, anomaly, goals, insights
 from app.config import settings
+from app.utils.etag import etag_for_bytes, etag_matches, not_modified
+from contextlib import asynccontextmanager
+from typing import Optional
 import logging
+import orjson
 
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(levelname)s %(name)s %(message)s',
+    force=True
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown hooks for the application"""
+    # Size the worker thread pool used for blocking ML inference
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREAD_POOL_SIZE
+    yield
+    # Stop the category batching worker
+    await category.batch_scheduler.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="FinSight AI ML Service",
     description="AI-powered financial intelligence microservice",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -31,6 +52,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger payloads (forecasts, insights); level 1 keeps CPU cost low
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
+
 # Include routers
 app.include_router(category.router, prefix="/api/v1", tags=["Category Prediction"])
 app.include_router(health.router, prefix="/api/v1", tags=["Health Score"])
@@ -40,30 +65,47 @@ app.include_router(goals.router, prefix="/api/v1", tags=["Goals"])
 app.include_router(insights.router, prefix="/api/v1", tags=["Insights"])
 
 
+HEALTH_PAYLOAD = {
+    "status": "healthy",
+    "service": "finsight-ai-ml-service",
+    "version": "1.0.0"
+}
+
+ROOT_PAYLOAD = {
+    "message": "FinSight AI ML Service",
+    "version": "1.0.0",
+    "endpoints": {
+        "health": "/health",
+        "docs": "/docs",
+        "category_prediction": "/api/v1/predict/category",
+        "health_score": "/api/v1/health/score",
+        "forecast": "/api/v1/forecast/generate",
+        "anomaly_detection": "/api/v1/anomaly/detect",
+        "goal_recommendations": "/api/v1/goals/recommend",
+        "insights": "/api/v1/insights/generate"
+    }
+}
+
+# Static payloads: serialized and hashed once at import
+HEALTH_BYTES = orjson.dumps(HEALTH_PAYLOAD)
+HEALTH_ETAG = etag_for_bytes(HEALTH_BYTES)
+ROOT_BYTES = orjson.dumps(ROOT_PAYLOAD)
+ROOT_ETAG = etag_for_bytes(ROOT_BYTES)
+
+
 @app.get("/health")
-async def health_check():
+async def health_check(if_none_match: Optional[str] = Header(None)):
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "finsight-ai-ml-service",
-        "version": "1.0.0"
-    }
+    if etag_matches(if_none_match, HEALTH_ETAG):
+        return not_modified(HEALTH_ETAG)
+    
+    return Response(content=HEALTH_BYTES, media_type="application/json", headers={"ETag": HEALTH_ETAG})
 
 
 @app.get("/")
-async def root():
+async def root(if_none_match: Optional[str] = Header(None)):
     """Root endpoint"""
-    return {
-        "message": "FinSight AI ML Service",
-        "version": "1.0.0",
-        "endpoints": {
-            "health": "/health",
-            "docs": "/docs",
-            "category_prediction": "/api/v1/predict/category",
-            "health_score": "/api/v1/health/score",
-            "forecast": "/api/v1/forecast/generate",
-            "anomaly_detection": "/api/v1/anomaly/detect",
-            "goal_recommendations": "/api/v1/goals/recommend",
-            "insights": "/api/v1/insights/generate"
-        }
-    }
+    if etag_matches(if_none_match, ROOT_ETAG):
+        return not_modified(ROOT_ETAG)
+    
+    return Response(content=ROOT_BYTES, media_type="application/json", headers={"ETag": ROOT_ETAG})
@@ -2,8 +2,10 @@
 Anomaly detection router
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import AnomalyDetectionRequest, AnomalyDetectionResponse
-from app.services.anomaly_detector import anomaly_detector
+from app.services.anomaly_detector import get_anomaly_detector
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,27 +13,24 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/anomaly/detect", response_model=AnomalyDetectionResponse)
+@router.post("/anomaly/detect", responses={200: {"model": AnomalyDetectionResponse}})
 async def detect_anomalies(request: AnomalyDetectionRequest):
     """
     Detect anomalies in transaction patterns
     """
+    detector = get_anomaly_detector()
+    
+    # Too little history to score; skip conversion and thread-pool dispatch
+    if len(request.transactions) < detector.min_transactions:
+        return ORJSONResponse({'anomalies': [], 'riskLevel': 'low', 'totalAnomalies': 0})
+    
     try:
         # Convert transaction history
-        transactions = [
-            {
-                'amount': t.amount,
-                'date': t.date,
-                'type': t.type,
-                'category': t.category,
-                'description': t.description or ''
-            }
-            for t in request.transactions
-        ]
+        transactions = request.model_dump(include={'transactions'})['transactions']
         
-        result = anomaly_detector.detect(transactions)
+        result = await run_in_threadpool(detector.detect, transactions)
         
-        return AnomalyDetectionResponse(**result)
+        return ORJSONResponse(result)
     except Exception as e:
-        logger.error(f"Anomaly detection error: {str(e)}")
+        logger.error("Anomaly detection error: %s", e)
         raise HTTPException(status_code=500, detail=f"Anomaly detection failed: {str(e)}")
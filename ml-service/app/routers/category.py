@@ -1,9 +1,14 @@
 """
 Category prediction router
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import CategoryPredictionRequest, CategoryPredictionResponse
-from app.services.category_predictor import category_predictor
+from app.services.batch_scheduler import BatchScheduler
+from app.services.category_predictor import get_category_predictor
+from app.config import settings
+from app.utils.etag import etag_for_parts, etag_matches, not_modified
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,24 +16,39 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/predict/category", response_model=CategoryPredictionResponse)
-async def predict_category(request: CategoryPredictionRequest):
+def _predict_batch(transactions):
+    """Run a batch through the shared predictor"""
+    return get_category_predictor().predict_batch(transactions)
+
+
+# Coalesces concurrent predictions into one vectorizer/model call
+batch_scheduler = BatchScheduler(
+    _predict_batch,
+    max_batch_size=settings.CATEGORY_BATCH_SIZE,
+    max_wait=settings.CATEGORY_BATCH_MAX_WAIT
+)
+
+
+@router.post("/predict/category", responses={200: {"model": CategoryPredictionResponse}})
+async def predict_category(
+    request: CategoryPredictionRequest,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Predict transaction category and needs vs wants classification
+    Predictions are deterministic for a given model version, so repeat
+    requests carrying the returned ETag get an empty 304
     """
+    etag = etag_for_parts(request.description, request.amount, request.type, settings.MODEL_VERSION)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
     try:
-        result = category_predictor.predict(
-            description=request.description,
-            amount=request.amount,
-            transaction_type=request.type
+        result = await batch_scheduler.submit(
+            (request.description, request.amount, request.type)
         )
         
-        return CategoryPredictionResponse(
-            category=result['category'],
-            needsVsWants=result['needsVsWants'],
-            confidence=result['confidence'],
-            reasoning=result.get('reasoning')
-        )
+        return ORJSONResponse(result, headers={"ETag": etag})
     except Exception as e:
-        logger.error(f"Category prediction error: {str(e)}")
+        logger.error("Category prediction error: %s", e)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
@@ -2,6 +2,8 @@
 Forecast router
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import ForecastRequest, ForecastResponse
 from app.services.forecast import forecast_generator
 import logging
@@ -11,29 +13,28 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/forecast/generate", response_model=ForecastResponse)
+@router.post("/forecast/generate", responses={200: {"model": ForecastResponse}})
 async def generate_forecast(request: ForecastRequest):
     """
     Generate cash flow forecast
     """
+    # Reject short histories before converting anything
+    if len(request.transactions) < forecast_generator.lookback_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient transaction history. Need at least {forecast_generator.lookback_days} days."
+        )
+    
     try:
         # Convert transaction history
-        transactions = [
-            {
-                'amount': t.amount,
-                'date': t.date,
-                'type': t.type,
-                'category': t.category
-            }
-            for t in request.transactions
-        ]
+        transactions = request.model_dump(include={'transactions'})['transactions']
         
-        result = forecast_generator.generate(transactions, request.forecastType)
+        result = await run_in_threadpool(forecast_generator.generate, transactions, request.forecastType)
         
-        return ForecastResponse(**result)
+        return ORJSONResponse(result)
     except ValueError as e:
-        logger.error(f"Forecast generation error: {str(e)}")
+        logger.error("Forecast generation error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Forecast generation error: {str(e)}")
+        logger.error("Forecast generation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Forecast generation failed: {str(e)}")
@@ -2,6 +2,8 @@
 Goal recommendation router
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import GoalRecommendationRequest, GoalRecommendationResponse
 from app.services.goal_recommender import goal_recommender
 import logging
@@ -11,22 +13,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/goals/recommend", response_model=GoalRecommendationResponse)
+@router.post("/goals/recommend", responses={200: {"model": GoalRecommendationResponse}})
 async def recommend_goals(request: GoalRecommendationRequest):
     """
     Generate AI-recommended financial goals
     """
     try:
         # Convert transaction history
-        transactions = [
-            {
-                'amount': t.amount,
-                'date': t.date,
-                'type': t.type,
-                'category': t.category
-            }
-            for t in request.transactions
-        ]
+        transactions = request.model_dump(include={'transactions'})['transactions']
         
         profile = {
             'monthlyIncome': request.profile.monthlyIncome,
@@ -34,9 +28,9 @@ async def recommend_goals(request: GoalRecommendationRequest):
             'budgetPreferences': request.profile.budgetPreferences or {}
         }
         
-        result = goal_recommender.recommend(transactions, profile)
+        result = await run_in_threadpool(goal_recommender.recommend, transactions, profile)
         
-        return GoalRecommendationResponse(**result)
+        return ORJSONResponse(result)
     except Exception as e:
-        logger.error(f"Goal recommendation error: {str(e)}")
+        logger.error("Goal recommendation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Goal recommendation failed: {str(e)}")
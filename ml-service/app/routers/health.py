@@ -2,6 +2,8 @@
 Health score router
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import HealthScoreRequest, HealthScoreResponse
 from app.services.health_score import health_score_calculator
 import logging
@@ -11,23 +13,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/health/score", response_model=HealthScoreResponse)
+@router.post("/health/score", responses={200: {"model": HealthScoreResponse}})
 async def compute_health_score(request: HealthScoreRequest):
     """
     Compute financial health score
     """
     try:
-        # Convert transaction history to dict format
-        transactions = [
-            {
-                'amount': t.amount,
-                'type': t.type,
-                'category': t.category,
-                'date': t.date,
-                'description': t.description or ''
-            }
-            for t in request.transactions
-        ]
+        # Convert transaction history
+        transactions = request.model_dump(include={'transactions'})['transactions']
         
         profile = {
             'monthlyIncome': request.profile.monthlyIncome,
@@ -35,9 +28,9 @@ async def compute_health_score(request: HealthScoreRequest):
             'budgetPreferences': request.profile.budgetPreferences or {}
         }
         
-        result = health_score_calculator.calculate(transactions, profile)
+        result = await run_in_threadpool(health_score_calculator.calculate, transactions, profile)
         
-        return HealthScoreResponse(**result)
+        return ORJSONResponse(result)
     except Exception as e:
-        logger.error(f"Health score computation error: {str(e)}")
+        logger.error("Health score computation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Health score computation failed: {str(e)}")
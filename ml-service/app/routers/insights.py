@@ -2,6 +2,8 @@
 Insights generation router
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import InsightsRequest, InsightsResponse
 from app.services.insights_generator import insights_generator
 import logging
@@ -11,23 +13,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/insights/generate", response_model=InsightsResponse)
+@router.post("/insights/generate", responses={200: {"model": InsightsResponse}})
 async def generate_insights(request: InsightsRequest):
     """
     Generate explainable insights and nudges
     """
     try:
         # Convert transaction history
-        transactions = [
-            {
-                'amount': t.amount,
-                'date': t.date,
-                'type': t.type,
-                'category': t.category,
-                'description': t.description or ''
-            }
-            for t in request.transactions
-        ]
+        transactions = request.model_dump(include={'transactions'})['transactions']
         
         profile = {
             'monthlyIncome': request.profile.monthlyIncome,
@@ -37,9 +30,9 @@ async def generate_insights(request: InsightsRequest):
         
         health_score = request.healthScore if request.healthScore else None
         
-        result = insights_generator.generate(transactions, profile, health_score)
+        result = await run_in_threadpool(insights_generator.generate, transactions, profile, health_score)
         
-        return InsightsResponse(**result)
+        return ORJSONResponse(result)
     except Exception as e:
-        logger.error(f"Insights generation error: {str(e)}")
+        logger.error("Insights generation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Insights generation failed: {str(e)}")
@@ -2,10 +2,13 @@
 Anomaly detection service
 Uses Isolation Forest and statistical methods
 """
+import hashlib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
+from functools import lru_cache
 from typing import List, Dict, Any
+from app.services.cache import LRUCache
+from app.services.preprocessing import to_columnar
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,11 +21,14 @@ class AnomalyDetector:
     """
     
     def __init__(self):
-        self.isolation_forest = IsolationForest(
-            contamination=0.1,
-            random_state=42,
-            n_estimators=100
-        )
+        self.min_transactions = 10
+        self.isolation_forest_params = {
+            'contamination': 0.1,
+            'random_state': 42,
+            'n_estimators': 100
+        }
+        # Isolation Forest results keyed by a digest of the feature matrix
+        self._isolation_cache = LRUCache(maxsize=256)
     
     def detect(self, transactions: List[Dict]) -> Dict[str, Any]:
         """
@@ -34,25 +40,24 @@ class AnomalyDetector:
         Returns:
             Dictionary with anomalies, risk level, and total count
         """
-        if len(transactions) < 10:
+        if len(transactions) < self.min_transactions:
             return {
                 'anomalies': [],
                 'riskLevel': 'low',
                 'totalAnomalies': 0
             }
         
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
+        # Extract columns
+        columns = to_columnar(transactions)
         
         # Extract features
-        features = self._extract_features(df)
+        features = self._extract_features(columns)
         
         # Detect anomalies
-        anomalies = self._detect_anomalies(df, features)
+        anomalies = self._detect_anomalies(columns, features)
         
         # Determine risk level
-        risk_level = self._determine_risk_level(len(anomalies), len(df))
+        risk_level = self._determine_risk_level(len(anomalies), len(features))
         
         return {
             'anomalies': anomalies,
@@ -60,43 +65,39 @@ class AnomalyDetector:
             'totalAnomalies': len(anomalies)
         }
     
-    def _extract_features(self, df: pd.DataFrame) -> np.ndarray:
+    def _extract_features(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
         """Extract features for anomaly detection"""
-        features = []
+        # Single float32 matrix filled column by column; Isolation Forest
+        # works in float32 internally, so this is also what it reads
+        features = np.empty((len(columns['amount']), 3), dtype=np.float32)
         
         # Amount features
-        amounts = df['amount'].values.reshape(-1, 1)
-        
-        # Date features (days since first transaction)
-        df['days_since_start'] = (df['date'] - df['date'].min()).dt.days
-        days = df['days_since_start'].values.reshape(-1, 1)
+        features[:, 0] = columns['amount']
         
-        # Category encoding (simple numeric)
-        category_map = {cat: i for i, cat in enumerate(df['category'].unique())}
-        df['category_encoded'] = df['category'].map(category_map)
-        categories = df['category_encoded'].values.reshape(-1, 1)
+        # Date features (whole days since first transaction)
+        dates = columns['date']
+        features[:, 1] = (dates - dates.min()) // np.timedelta64(1, 'D')
         
-        # Combine features
-        features = np.hstack([amounts, days, categories])
+        # Category encoding (codes in order of first appearance)
+        features[:, 2] = pd.factorize(columns['category'])[0]
         
         return features
     
-    def _detect_anomalies(self, df: pd.DataFrame, features: np.ndarray) -> List[Dict]:
+    def _detect_anomalies(self, columns: Dict[str, np.ndarray], features: np.ndarray) -> List[Dict]:
         """Detect anomalies using Isolation Forest and z-score"""
         anomalies = []
         
         # Isolation Forest
         if len(features) >= 10:
             try:
-                predictions = self.isolation_forest.fit_predict(features)
-                isolation_anomalies = np.where(predictions == -1)[0]
+                isolation_anomalies = self._isolation_anomalies(features)
             except:
                 isolation_anomalies = []
         else:
             isolation_anomalies = []
         
         # Z-score based detection
-        amounts = df['amount'].values
+        amounts = columns['amount']
         mean = np.mean(amounts)
         std = np.std(amounts)
         
@@ -108,7 +109,6 @@ class AnomalyDetector:
         
         # Create anomaly records
         for idx in all_anomaly_indices:
-            row = df.iloc[idx]
             anomaly_score = float(z_scores[idx]) if idx < len(z_scores) else 1.0
             
             # Determine severity
@@ -120,7 +120,7 @@ class AnomalyDetector:
                 severity = 'low'
             
             # Generate reason
-            reason = self._generate_reason(row, anomaly_score)
+            reason = self._generate_reason(amounts[idx], columns['category'][idx], anomaly_score)
             
             anomalies.append({
                 'transactionIndex': int(idx),
@@ -131,16 +131,43 @@ class AnomalyDetector:
         
         return anomalies
     
-    def _generate_reason(self, row: pd.Series, score: float) -> str:
+    def _isolation_anomalies(self, features: np.ndarray) -> np.ndarray:
+        """
+        Indices flagged by Isolation Forest
+        Fitting is deterministic (fixed random_state), so results for a feature
+        matrix seen before are served from cache instead of refitting 100 trees
+        """
+        key = (
+            features.shape,
+            features.dtype.str,
+            hashlib.blake2b(np.ascontiguousarray(features).tobytes(), digest_size=16).digest()
+        )
+        cached = self._isolation_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        predictions = self._build_isolation_forest().fit_predict(features)
+        isolation_anomalies = np.where(predictions == -1)[0]
+        self._isolation_cache.put(key, isolation_anomalies)
+        
+        return isolation_anomalies
+    
+    def _build_isolation_forest(self):
+        """Create a fresh Isolation Forest, importing sklearn on first use"""
+        from sklearn.ensemble import IsolationForest
+        
+        return IsolationForest(**self.isolation_forest_params)
+    
+    def _generate_reason(self, amount: float, category: str, score: float) -> str:
         """Generate human-readable reason for anomaly"""
         reasons = []
         
         if score > 2.5:
-            reasons.append(f"Unusually high amount (${row['amount']:.2f})")
+            reasons.append(f"Unusually high amount (${amount:.2f})")
         
         # Check for unusual category
-        if row.get('category'):
-            reasons.append(f"Transaction in category: {row['category']}")
+        if category:
+            reasons.append(f"Transaction in category: {category}")
         
         return ". ".join(reasons) if reasons else "Statistical anomaly detected"
     
@@ -159,5 +186,7 @@ class AnomalyDetector:
             return 'low'
 
 
-# Singleton instance
-anomaly_detector = AnomalyDetector()
+@lru_cache(maxsize=1)
+def get_anomaly_detector() -> AnomalyDetector:
+    """Return the shared detector, creating it on first request"""
+    return AnomalyDetector()
@@ -0,0 +1,96 @@
+"""
+Request batching service
+Coalesces concurrent requests into a single batched model call
+"""
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Callable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Collects items submitted by concurrent requests and processes them together
+    A batch is flushed once it holds max_batch_size items or max_wait seconds
+    have passed since its first item arrived
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 64, max_wait: float = 0.008):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result
+
+        Args:
+            item: Single input accepted by batch_fn
+
+        Returns:
+            The result batch_fn produced for this item
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._start(loop)
+
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def stop(self):
+        """Cancel the background worker"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        """Start the background worker on the running event loop"""
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Pull batches off the queue until cancelled"""
+        while True:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+
+            if len(batch) < self.max_batch_size:
+                await asyncio.sleep(self.max_wait)
+                self._drain(batch)
+
+            await self._process(batch)
+
+    def _drain(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Move queued items into the batch without waiting"""
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run batch_fn once and fan the results out to the waiting requests"""
+        items = [item for item, _ in batch]
+
+        try:
+            results = await run_in_threadpool(self.batch_fn, items)
+        except Exception as e:
+            logger.error("Batch processing error: %s", e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
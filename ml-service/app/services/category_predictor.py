@@ -4,13 +4,15 @@ Uses TF-IDF + Logistic Regression for explainable categorization
 """
 import re
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
+from functools import lru_cache
+from typing import List, Tuple
+from app.services.cache import LRUCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+_SPECIAL_CHARS_RE = re.compile(r'[^a-z0-9\s]')
+
 
 class CategoryPredictor:
     """
@@ -27,12 +29,19 @@ class CategoryPredictor:
             'Entertainment', 'Healthcare', 'Education', 'Travel', 'Bills & Fees',
             'Other Expense', 'Salary', 'Freelance', 'Investment', 'Other Income'
         ]
+        self._income_set = frozenset(['Salary', 'Freelance', 'Investment', 'Other Income'])
+        self._expense_set = frozenset(self.categories) - self._income_set
+        # (cleaned description, type) -> (category, needsVsWants, confidence)
+        self._prediction_cache = LRUCache(maxsize=10_000)
         self._initialize_models()
     
     def _initialize_models(self):
         """Initialize models with training data"""
         # In production, load pre-trained models
         # For now, use rule-based + simple ML
+        # sklearn is imported here so app startup doesn't pay for it
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
         
         # TF-IDF vectorizer
         self.vectorizer = TfidfVectorizer(
@@ -57,6 +66,17 @@ class CategoryPredictor:
         
         # Train with basic patterns (in production, use real training data)
         self._train_with_patterns()
+        
+        # Linear model parameters for the hand-rolled forward pass in predict
+        self._category_weights = self.category_model.coef_.T
+        self._category_bias = self.category_model.intercept_
+        self._needs_weights = self.needs_model.coef_.T
+        self._needs_bias = self.needs_model.intercept_
+        
+        # Which model classes are valid for each transaction type
+        classes = self.category_model.classes_
+        self._income_class_mask = np.array([c in self._income_set for c in classes])
+        self._expense_class_mask = np.array([c in self._expense_set for c in classes])
     
     def _train_with_patterns(self):
         """Train models with pattern-based examples"""
@@ -114,42 +134,79 @@ class CategoryPredictor:
         Returns:
             Dictionary with category, needsVsWants, confidence, and reasoning
         """
-        # Clean description
-        cleaned = self._clean_description(description)
+        return self.predict_batch([(description, amount, transaction_type)])[0]
+    
+    def predict_batch(self, transactions: List[Tuple[str, float, str]]) -> List[dict]:
+        """
+        Predict category and needs vs wants for several transactions at once
         
-        # Vectorize
-        X = self.vectorizer.transform([cleaned])
+        Args:
+            transactions: List of (description, amount, transaction_type) tuples
+        
+        Returns:
+            List of prediction dictionaries, in input order
+        """
+        # Clean descriptions; predictions only depend on (cleaned, type)
+        keys = [(self._clean_description(description), transaction_type)
+                for description, _, transaction_type in transactions]
+        outcomes = [self._prediction_cache.get(key) for key in keys]
+        misses = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        
+        if misses:
+            # Vectorize all uncached descriptions once
+            X = self.vectorizer.transform([keys[i][0] for i in misses])
+            
+            # Predict category and needs vs wants for every row
+            category_probs = self._predict_proba(X, self._category_weights, self._category_bias)
+            needs_probs = self._predict_proba(X, self._needs_weights, self._needs_bias)
+            
+            for row, i in enumerate(misses):
+                outcomes[i] = self._classify(keys[i][1], category_probs[row], needs_probs[row])
+                self._prediction_cache.put(keys[i], outcomes[i])
         
-        # Predict category
-        category_probs = self.category_model.predict_proba(X)[0]
+        return [
+            self._build_prediction(description, *outcome)
+            for (description, _, _), outcome in zip(transactions, outcomes)
+        ]
+    
+    def _predict_proba(self, X, weights: np.ndarray, bias: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for a fitted LogisticRegression, computed directly
+        Equivalent to predict_proba but skips sklearn's per-call input validation
+        """
+        scores = X @ weights + bias
+        
+        # Binary model: one logit for the positive class
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.hstack([1.0 - positive, positive])
+        
+        # Multinomial model: row-wise softmax
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+    
+    def _classify(self, transaction_type: str, category_probs: np.ndarray,
+                  needs_probs: np.ndarray) -> Tuple[str, str, float]:
+        """Turn one row of class probabilities into (category, needsVsWants, confidence)"""
         category_idx = np.argmax(category_probs)
         predicted_category = self.category_model.classes_[category_idx]
         category_confidence = float(category_probs[category_idx])
         
         # Filter by transaction type
         if transaction_type == 'income':
-            income_categories = ['Salary', 'Freelance', 'Investment', 'Other Income']
-            if predicted_category not in income_categories:
-                # Find best income category
-                income_indices = [i for i, cat in enumerate(self.category_model.classes_) 
-                                if cat in income_categories]
-                if income_indices:
-                    best_income_idx = max(income_indices, key=lambda i: category_probs[i])
-                    predicted_category = self.category_model.classes_[best_income_idx]
-                    category_confidence = float(category_probs[best_income_idx])
+            allowed_mask = self._income_class_mask
         else:
-            expense_categories = [c for c in self.categories if c not in 
-                                ['Salary', 'Freelance', 'Investment', 'Other Income']]
-            if predicted_category not in expense_categories:
-                expense_indices = [i for i, cat in enumerate(self.category_model.classes_) 
-                                 if cat in expense_categories]
-                if expense_indices:
-                    best_expense_idx = max(expense_indices, key=lambda i: category_probs[i])
-                    predicted_category = self.category_model.classes_[best_expense_idx]
-                    category_confidence = float(category_probs[best_expense_idx])
-        
-        # Predict needs vs wants
-        needs_probs = self.needs_model.predict_proba(X)[0]
+            allowed_mask = self._expense_class_mask
+        
+        if not allowed_mask[category_idx] and allowed_mask.any():
+            # Find best category of the right type
+            best_idx = np.argmax(np.where(allowed_mask, category_probs, -np.inf))
+            predicted_category = self.category_model.classes_[best_idx]
+            category_confidence = float(category_probs[best_idx])
+        
+        # Needs vs wants
         needs_idx = np.argmax(needs_probs)
         needs_prediction = self.needs_model.classes_[needs_idx]
         needs_confidence = float(needs_probs[needs_idx])
@@ -163,13 +220,16 @@ class CategoryPredictor:
         # Overall confidence (average)
         overall_confidence = (category_confidence + needs_confidence) / 2
         
-        # Generate reasoning
-        reasoning = self._generate_reasoning(description, predicted_category, needs_vs_wants, overall_confidence)
+        return predicted_category, needs_vs_wants, overall_confidence
+    
+    def _build_prediction(self, description: str, category: str, needs_vs_wants: str, confidence: float) -> dict:
+        """Assemble the prediction response for one description"""
+        reasoning = self._generate_reasoning(description, category, needs_vs_wants, confidence)
         
         return {
-            'category': predicted_category,
+            'category': category,
             'needsVsWants': needs_vs_wants,
-            'confidence': overall_confidence,
+            'confidence': confidence,
             'reasoning': reasoning
         }
     
@@ -178,7 +238,7 @@ class CategoryPredictor:
         # Lowercase
         text = description.lower()
         # Remove special characters (keep spaces)
-        text = re.sub(r'[^a-z0-9\s]', '', text)
+        text = _SPECIAL_CHARS_RE.sub('', text)
         # Remove extra spaces
         text = ' '.join(text.split())
         return text
@@ -196,5 +256,7 @@ class CategoryPredictor:
         return reasoning
 
 
-# Singleton instance
-category_predictor = CategoryPredictor()
+@lru_cache(maxsize=1)
+def get_category_predictor() -> CategoryPredictor:
+    """Return the shared predictor, training it on first request"""
+    return CategoryPredictor()
@@ -3,9 +3,9 @@ Cash flow forecasting service
 Uses LSTM for time-series forecasting
 """
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+from app.services.preprocessing import day_numbers, to_columnar
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,19 +41,18 @@ class ForecastGenerator:
         if len(transactions) < self.lookback_days:
             raise ValueError(f"Insufficient transaction history. Need at least {self.lookback_days} days.")
         
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+        # Extract columns
+        columns = to_columnar(transactions)
         
-        # Create daily cash flow
-        df['date_only'] = df['date'].dt.date
-        daily_cashflow = df.groupby('date_only')['amount'].sum().reset_index()
-        daily_cashflow.columns = ['date', 'amount']
-        daily_cashflow = daily_cashflow.sort_values('date')
+        # Create daily cash flow by bucketing on integer day numbers
+        days = day_numbers(columns['date'])
+        first_day = days.min()
+        offsets = days - first_day
+        daily_cashflow = np.bincount(offsets, weights=columns['amount'])
+        active_days = np.flatnonzero(np.bincount(offsets))
         
-        # Get last N days for training
-        recent_data = daily_cashflow.tail(self.lookback_days)['amount'].values
+        # Get last N days with activity for training
+        recent_data = daily_cashflow[active_days[-self.lookback_days:]]
         
         # Generate predictions
         predictions = self._generate_predictions(recent_data, horizon)
@@ -65,8 +64,8 @@ class ForecastGenerator:
         metadata = {
             'modelVersion': 'v1.0',
             'trainingDataRange': {
-                'start': str(daily_cashflow['date'].min()),
-                'end': str(daily_cashflow['date'].max())
+                'start': str(np.datetime64(int(first_day + active_days[0]), 'D')),
+                'end': str(np.datetime64(int(first_day + active_days[-1]), 'D'))
             },
             'featuresUsed': ['daily_cashflow', 'trend', 'seasonality']
         }
@@ -95,29 +94,35 @@ class ForecastGenerator:
         # Calculate volatility for confidence bands
         std_dev = np.std(historical_data[-window:])
         
-        predictions = []
         start_date = datetime.now().date()
         
-        for i in range(horizon):
-            date = start_date + timedelta(days=i)
-            
-            # Base prediction with trend
-            base_prediction = moving_avg + (trend * i)
-            
-            # Confidence bands (±1.5 standard deviations)
-            lower_bound = base_prediction - 1.5 * std_dev
-            upper_bound = base_prediction + 1.5 * std_dev
-            
-            # Confidence decreases over time
-            confidence = max(0.5, 1.0 - (i / horizon) * 0.3)
-            
-            predictions.append({
-                'date': str(date),
-                'predictedAmount': round(float(base_prediction), 2),
-                'lowerBound': round(float(lower_bound), 2),
-                'upperBound': round(float(upper_bound), 2),
-                'confidence': round(confidence, 2)
-            })
+        # Base prediction with trend, for every day of the horizon at once
+        days = np.arange(horizon)
+        base_prediction = moving_avg + trend * days
+        
+        # Confidence bands (±1.5 standard deviations)
+        lower_bound = base_prediction - 1.5 * std_dev
+        upper_bound = base_prediction + 1.5 * std_dev
+        
+        # Confidence decreases over time
+        confidence = np.maximum(0.5, 1.0 - (days / horizon) * 0.3)
+        
+        predictions = [
+            {
+                'date': str(start_date + timedelta(days=i)),
+                'predictedAmount': predicted,
+                'lowerBound': lower,
+                'upperBound': upper,
+                'confidence': conf
+            }
+            for i, predicted, lower, upper, conf in zip(
+                range(horizon),
+                np.round(base_prediction, 2).tolist(),
+                np.round(lower_bound, 2).tolist(),
+                np.round(upper_bound, 2).tolist(),
+                np.round(confidence, 2).tolist()
+            )
+        ]
         
         return predictions
     
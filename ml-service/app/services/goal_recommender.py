@@ -3,13 +3,26 @@ Goal recommendation service
 Generates AI-recommended financial goals based on user behavior
 """
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.services.preprocessing import PreparedTransactions, bucket_totals, day_numbers, month_numbers, prepare_frame
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Goal text templates, filled with str.format_map
+SAVINGS_TITLE = 'Achieve {target_rate}% Savings Rate'
+SAVINGS_DESCRIPTION = 'Increase savings rate from {current_rate:.1f}% to {target_rate}%'
+SAVINGS_REASONING = 'Current savings rate ({current_rate:.1f}%) is below target ({target_rate}%). Aim to save ${target_amount:.2f} this month.'
+
+CATEGORY_TITLE = 'Reduce {category} Spending'
+CATEGORY_DESCRIPTION = 'Limit {category} spending to ${cap:.2f} per month'
+CATEGORY_REASONING = '{category} spending (${current_avg:.2f}/month) is high. Reducing to ${cap:.2f} will improve financial health.'
+CATEGORY_EVIDENCE = 'Average monthly spending on {category}'
+
+DAILY_DESCRIPTION = 'Limit daily spending to ${cap:.2f}'
+DAILY_REASONING = 'Daily spending varies significantly. Capping at ${cap:.2f} (vs current avg ${current_avg:.2f}) will reduce volatility.'
+
 
 class GoalRecommender:
     """
@@ -17,13 +30,14 @@ class GoalRecommender:
     Uses rule-based + pattern analysis
     """
     
-    def recommend(self, transactions: List[Dict], profile: Dict) -> Dict[str, Any]:
+    def recommend(self, transactions: List[Dict], profile: Dict, prepared: Optional[PreparedTransactions] = None) -> Dict[str, Any]:
         """
         Generate goal recommendations
         
         Args:
             transactions: List of transaction dictionaries
             profile: User profile with income and preferences
+            prepared: Optional frame from prepare_frame(transactions)
         
         Returns:
             Dictionary with recommended goals
@@ -31,17 +45,24 @@ class GoalRecommender:
         if len(transactions) < 10:
             return {'goals': []}
         
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
+        if prepared is None:
+            prepared = prepare_frame(transactions)
         
         goals = []
         
+        # One "today" for every goal in this response
+        today = datetime.now().date()
+        start_date = str(today)
+        month_end = str(today + timedelta(days=30))
+        week_end = str(today + timedelta(days=7))
+        
         # Analyze spending patterns
-        expense_df = df[df['type'] == 'expense']
-        income_df = df[df['type'] == 'income']
+        expense_amounts = prepared.amounts[prepared.is_expense]
+        expense_dates = prepared.dates[prepared.is_expense]
+        expense_codes = prepared.category_codes[prepared.is_expense]
         
         monthly_income = profile.get('monthlyIncome', 0)
-        avg_monthly_expenses = expense_df.groupby(df['date'].dt.to_period('M'))['amount'].sum().mean()
+        avg_monthly_expenses = prepared.avg_monthly_expenses
         
         # Goal 1: Savings target
         if monthly_income > 0:
@@ -50,83 +71,91 @@ class GoalRecommender:
             
             if current_savings_rate < target_savings_rate:
                 target_savings = monthly_income * (target_savings_rate / 100)
-                goals.append(self._create_savings_goal(target_savings, target_savings_rate, current_savings_rate))
+                goals.append(self._create_savings_goal(target_savings, target_savings_rate, current_savings_rate, start_date, month_end))
         
         # Goal 2: Category spending cap
-        category_totals = expense_df.groupby('category')['amount'].sum()
-        top_category = category_totals.idxmax() if len(category_totals) > 0 else None
+        totals = prepared.expense_category_totals
+        top_category = None
+        if len(totals) > 0 and np.isfinite(totals.max()):
+            top_code = int(totals.argmax())
+            top_category = prepared.categories[top_code]
+            top_amount = totals[top_code]
         
-        if top_category and category_totals[top_category] > monthly_income * 0.3:
-            avg_category_spending = category_totals[top_category] / len(expense_df[expense_df['category'] == top_category].groupby(expense_df['date'].dt.to_period('M')))
+        if top_category and top_amount > monthly_income * 0.3:
+            months_active = np.unique(month_numbers(expense_dates[expense_codes == top_code])).size
+            avg_category_spending = top_amount / months_active
             cap = avg_category_spending * 0.9  # 10% reduction
-            goals.append(self._create_category_limit_goal(top_category, cap, avg_category_spending))
+            goals.append(self._create_category_limit_goal(top_category, cap, avg_category_spending, start_date, month_end))
         
         # Goal 3: Daily spending cap
-        if len(expense_df) > 0:
-            daily_spending = expense_df.groupby(expense_df['date'].dt.date)['amount'].sum()
+        if len(expense_amounts) > 0:
+            daily_spending = bucket_totals(day_numbers(expense_dates), expense_amounts)
             avg_daily = daily_spending.mean()
-            p75_daily = daily_spending.quantile(0.75)
+            
+            # 75th percentile by selection, interpolated linearly like quantile()
+            position = 0.75 * (len(daily_spending) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(daily_spending) - 1)
+            selected = np.partition(daily_spending, (lower, upper))
+            p75_daily = selected[lower] + (selected[upper] - selected[lower]) * (position - lower)
             
             if p75_daily > avg_daily * 1.2:
                 cap = avg_daily * 1.1
-                goals.append(self._create_daily_spending_goal(cap, avg_daily))
+                goals.append(self._create_daily_spending_goal(cap, avg_daily, start_date, week_end))
         
         return {'goals': goals}
     
-    def _create_savings_goal(self, target_amount: float, target_rate: float, current_rate: float) -> Dict:
+    def _create_savings_goal(self, target_amount: float, target_rate: float, current_rate: float, start_date: str, end_date: str) -> Dict:
         """Create savings target goal"""
-        start_date = datetime.now().date()
-        end_date = start_date + timedelta(days=30)
+        context = {'target_amount': target_amount, 'target_rate': target_rate, 'current_rate': current_rate}
         
         return {
-            'title': f'Achieve {target_rate}% Savings Rate',
-            'description': f'Increase savings rate from {current_rate:.1f}% to {target_rate}%',
+            'title': SAVINGS_TITLE.format_map(context),
+            'description': SAVINGS_DESCRIPTION.format_map(context),
             'type': 'savings_target',
             'targetValue': target_amount,
             'period': 'monthly',
-            'startDate': str(start_date),
-            'endDate': str(end_date),
-            'reasoning': f'Current savings rate ({current_rate:.1f}%) is below target ({target_rate}%). Aim to save ${target_amount:.2f} this month.',
+            'startDate': start_date,
+            'endDate': end_date,
+            'reasoning': SAVINGS_REASONING.format_map(context),
             'evidence': [
                 {'metric': 'current_savings_rate', 'value': current_rate, 'explanation': 'Current monthly savings rate'},
                 {'metric': 'target_savings_rate', 'value': target_rate, 'explanation': 'Target savings rate from preferences'}
             ]
         }
     
-    def _create_category_limit_goal(self, category: str, cap: float, current_avg: float) -> Dict:
+    def _create_category_limit_goal(self, category: str, cap: float, current_avg: float, start_date: str, end_date: str) -> Dict:
         """Create category spending limit goal"""
-        start_date = datetime.now().date()
-        end_date = start_date + timedelta(days=30)
+        context = {'category': category, 'cap': cap, 'current_avg': current_avg}
         
         return {
-            'title': f'Reduce {category} Spending',
-            'description': f'Limit {category} spending to ${cap:.2f} per month',
+            'title': CATEGORY_TITLE.format_map(context),
+            'description': CATEGORY_DESCRIPTION.format_map(context),
             'type': 'category_limit',
             'targetValue': cap,
             'period': 'monthly',
-            'startDate': str(start_date),
-            'endDate': str(end_date),
-            'reasoning': f'{category} spending (${current_avg:.2f}/month) is high. Reducing to ${cap:.2f} will improve financial health.',
+            'startDate': start_date,
+            'endDate': end_date,
+            'reasoning': CATEGORY_REASONING.format_map(context),
             'evidence': [
-                {'metric': 'current_category_spending', 'value': current_avg, 'explanation': f'Average monthly spending on {category}'},
+                {'metric': 'current_category_spending', 'value': current_avg, 'explanation': CATEGORY_EVIDENCE.format_map(context)},
                 {'metric': 'recommended_cap', 'value': cap, 'explanation': '10% reduction target'}
             ]
         }
     
-    def _create_daily_spending_goal(self, cap: float, current_avg: float) -> Dict:
+    def _create_daily_spending_goal(self, cap: float, current_avg: float, start_date: str, end_date: str) -> Dict:
         """Create daily spending cap goal"""
-        start_date = datetime.now().date()
-        end_date = start_date + timedelta(days=7)
+        context = {'cap': cap, 'current_avg': current_avg}
         
         return {
             'title': 'Daily Spending Cap',
-            'description': f'Limit daily spending to ${cap:.2f}',
+            'description': DAILY_DESCRIPTION.format_map(context),
             'type': 'spending_cap',
             'targetValue': cap,
             'period': 'daily',
-            'startDate': str(start_date),
-            'endDate': str(end_date),
-            'reasoning': f'Daily spending varies significantly. Capping at ${cap:.2f} (vs current avg ${current_avg:.2f}) will reduce volatility.',
+            'startDate': start_date,
+            'endDate': end_date,
+            'reasoning': DAILY_REASONING.format_map(context),
             'evidence': [
                 {'metric': 'average_daily_spending', 'value': current_avg, 'explanation': 'Average daily spending'},
                 {'metric': 'recommended_cap', 'value': cap, 'explanation': '10% above average'}
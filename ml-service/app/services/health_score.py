@@ -3,13 +3,69 @@ Financial health score computation service
 Calculates composite health score from multiple factors
 """
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.services.cache import LRUCache
+from app.services.preprocessing import PreparedTransactions, bucket_totals, day_numbers, fingerprint, prepare_frame
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Sub-scores in reporting order
+SUB_SCORE_KEYS = ('savingsRate', 'spendingVolatility', 'incomeToExpenseRatio', 'budgetAdherence', 'anomalyScore')
+
+# Recommendation for each sub-score, aligned with SUB_SCORE_KEYS
+LOW_SCORE_RECOMMENDATIONS = (
+    "Increase your savings rate. Aim for at least 20% of income.",
+    "Reduce spending volatility. Try to maintain consistent daily spending patterns.",
+    "Your expenses are high relative to income. Consider reducing discretionary spending.",
+    "Improve budget adherence. Track spending against your budget categories.",
+    "Review unusual transactions. Some spending patterns may need attention."
+)
+
+
+def _count_outliers_numpy(amounts: np.ndarray, threshold: float) -> int:
+    """Count amounts more than threshold population standard deviations from the mean"""
+    std = np.std(amounts)
+    if std == 0:
+        return 0
+    
+    z_scores = np.abs((amounts - np.mean(amounts)) / std)
+    return int(np.sum(z_scores > threshold))
+
+
+def _count_outliers_loops(amounts, threshold):
+    """Fused z-score count: Welford pass for mean/std, then one counting pass (compiled with numba)"""
+    n = amounts.shape[0]
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        delta = amounts[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (amounts[i] - mean)
+    
+    std = np.sqrt(m2 / n)
+    if std == 0.0:
+        return 0
+    
+    count = 0
+    for i in range(n):
+        if abs(amounts[i] - mean) / std > threshold:
+            count += 1
+    return count
+
+
+@lru_cache(maxsize=1)
+def _get_outlier_counter():
+    """Return the numba-compiled counter, importing numba on first use; numpy when it is not installed"""
+    try:
+        from numba import njit
+    except ImportError:
+        return _count_outliers_numpy
+    
+    return njit(cache=True)(_count_outliers_loops)
+
 
 class HealthScoreCalculator:
     """
@@ -25,14 +81,21 @@ class HealthScoreCalculator:
             'budgetAdherence': 0.20,
             'anomalyScore': 0.10
         }
+        self._weight_vector = np.array([self.weights[key] for key in SUB_SCORE_KEYS], dtype=np.float64)
+        self._result_cache = LRUCache(maxsize=256)
+    
+    def clear_cache(self):
+        """Drop memoized health scores"""
+        self._result_cache.clear()
     
-    def calculate(self, transactions: List[Dict], profile: Dict) -> Dict[str, Any]:
+    def calculate(self, transactions: List[Dict], profile: Dict, prepared: Optional[PreparedTransactions] = None) -> Dict[str, Any]:
         """
         Calculate comprehensive health score
         
         Args:
             transactions: List of transaction dictionaries
             profile: User profile with income and preferences
+            prepared: Optional frame from prepare_frame(transactions)
         
         Returns:
             Dictionary with overall score, sub-scores, explanation, metrics, and recommendations
@@ -40,13 +103,19 @@ class HealthScoreCalculator:
         if len(transactions) < 10:
             return self._default_health_score("Insufficient transaction history")
         
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+        # Scores are a pure function of the history and profile, so repeat requests are memoized
+        transactions_key = fingerprint(transactions)
+        cache_key = (transactions_key, profile.get('monthlyIncome', 0))
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Convert to numpy columns
+        if prepared is None:
+            prepared = prepare_frame(transactions, key=transactions_key)
         
         # Calculate metrics
-        metrics = self._calculate_metrics(df, profile)
+        metrics = self._calculate_metrics(prepared, profile)
         
         # Calculate sub-scores
         sub_scores = {
@@ -54,22 +123,21 @@ class HealthScoreCalculator:
             'spendingVolatility': self._score_volatility(metrics['spendingStdDev'], metrics['avgDailySpending']),
             'incomeToExpenseRatio': self._score_income_expense_ratio(metrics['incomeToExpenseRatio']),
             'budgetAdherence': self._score_budget_adherence(metrics.get('budgetUtilization', 0)),
-            'anomalyScore': self._score_anomalies(metrics.get('anomalyCount', 0), len(df))
+            'anomalyScore': self._score_anomalies(metrics.get('anomalyCount', 0), len(prepared.amounts))
         }
         
+        scores = np.fromiter((sub_scores[key]['score'] for key in SUB_SCORE_KEYS), dtype=np.float64, count=len(SUB_SCORE_KEYS))
+        
         # Calculate weighted overall score
-        overall_score = sum(
-            sub_scores[key]['score'] * self.weights[key]
-            for key in sub_scores.keys()
-        )
+        overall_score = float(scores @ self._weight_vector)
         
         # Generate explanation
-        explanation = self._generate_explanation(overall_score, sub_scores, metrics)
+        explanation = self._generate_explanation(overall_score, scores, metrics)
         
         # Generate recommendations
-        recommendations = self._generate_recommendations(sub_scores, metrics)
+        recommendations = self._generate_recommendations(scores, metrics)
         
-        return {
+        result = {
             'overallScore': round(overall_score, 1),
             'subScores': {
                 key: {
@@ -80,48 +148,56 @@ class HealthScoreCalculator:
             },
             'explanation': explanation,
             'metrics': {
-                'totalIncome': float(metrics['totalIncome']),
-                'totalExpenses': float(metrics['totalExpenses']),
-                'savings': float(metrics['savings']),
-                'savingsRate': float(metrics['savingsRate']),
-                'avgDailySpending': float(metrics['avgDailySpending']),
-                'spendingStdDev': float(metrics['spendingStdDev']),
-                'budgetUtilization': float(metrics.get('budgetUtilization', 0)),
-                'anomalyCount': int(metrics.get('anomalyCount', 0))
+                'totalIncome': metrics['totalIncome'],
+                'totalExpenses': metrics['totalExpenses'],
+                'savings': metrics['savings'],
+                'savingsRate': metrics['savingsRate'],
+                'avgDailySpending': metrics['avgDailySpending'],
+                'spendingStdDev': metrics['spendingStdDev'],
+                'budgetUtilization': metrics.get('budgetUtilization', 0.0),
+                'anomalyCount': metrics.get('anomalyCount', 0)
             },
             'recommendations': recommendations
         }
+        
+        self._result_cache.put(cache_key, result)
+        return result
     
-    def _calculate_metrics(self, df: pd.DataFrame, profile: Dict) -> Dict:
+    def _calculate_metrics(self, prepared: PreparedTransactions, profile: Dict) -> Dict:
         """Calculate base metrics from transactions"""
-        income_df = df[df['type'] == 'income']
-        expense_df = df[df['type'] == 'expense']
+        amounts = prepared.amounts
+        is_expense = prepared.is_expense
         
-        total_income = income_df['amount'].sum() if len(income_df) > 0 else 0
-        total_expenses = expense_df['amount'].sum() if len(expense_df) > 0 else 0
+        total_income = prepared.total_income
+        expense_amounts = amounts[is_expense]
+        total_expenses = prepared.total_expenses
         savings = total_income - total_expenses
         
         # Savings rate
-        savings_rate = (savings / total_income * 100) if total_income > 0 else 0
+        savings_rate = (savings / total_income * 100) if total_income > 0 else 0.0
         
-        # Daily spending statistics
-        if len(expense_df) > 0:
-            expense_df['date_only'] = expense_df['date'].dt.date
-            daily_spending = expense_df.groupby('date_only')['amount'].sum()
+        # Daily spending statistics, bucketed by calendar day
+        expense_count = len(expense_amounts)
+        if expense_count > 1:
+            daily_spending = bucket_totals(day_numbers(prepared.dates[is_expense]), expense_amounts)
             avg_daily_spending = daily_spending.mean()
-            spending_std = daily_spending.std() if len(daily_spending) > 1 else 0
+            spending_std = daily_spending.std(ddof=1) if len(daily_spending) > 1 else 0.0
+        elif expense_count == 1:
+            # A single expense is a single day; nothing to bucket
+            avg_daily_spending = expense_amounts[0]
+            spending_std = 0.0
         else:
-            avg_daily_spending = 0
-            spending_std = 0
+            avg_daily_spending = 0.0
+            spending_std = 0.0
         
         # Income to expense ratio
         income_to_expense = (total_income / total_expenses) if total_expenses > 0 else float('inf')
         
         # Budget utilization (if available)
-        budget_utilization = 0  # Would need budget data
+        budget_utilization = 0.0  # Would need budget data
         
         # Anomaly count (simple z-score based)
-        anomaly_count = self._count_anomalies(expense_df)
+        anomaly_count = self._count_anomalies(expense_amounts)
         
         return {
             'totalIncome': total_income,
@@ -196,36 +272,27 @@ class HealthScoreCalculator:
         score = max(100 - (anomaly_rate * 1000), 0)
         return {'score': score}
     
-    def _count_anomalies(self, expense_df: pd.DataFrame) -> int:
+    def _count_anomalies(self, amounts: np.ndarray) -> int:
         """Count anomalies using z-score"""
-        if len(expense_df) < 3:
-            return 0
-        
-        amounts = expense_df['amount'].values
-        mean = np.mean(amounts)
-        std = np.std(amounts)
-        
-        if std == 0:
+        if len(amounts) < 3:
             return 0
         
-        z_scores = np.abs((amounts - mean) / std)
-        anomalies = np.sum(z_scores > 2.5)  # 2.5 standard deviations
-        
-        return int(anomalies)
+        # 2.5 standard deviations
+        return int(_get_outlier_counter()(amounts, 2.5))
     
-    def _generate_explanation(self, overall_score: float, sub_scores: Dict, metrics: Dict) -> str:
+    def _generate_explanation(self, overall_score: float, scores: np.ndarray, metrics: Dict) -> str:
         """Generate human-readable explanation"""
         score_level = "excellent" if overall_score >= 80 else "good" if overall_score >= 60 else "fair" if overall_score >= 40 else "poor"
         
         explanation = f"Your financial health score is {overall_score:.1f}/100 ({score_level}). "
         
         # Highlight strengths
-        strengths = [key for key, value in sub_scores.items() if value['score'] >= 70]
+        strengths = [SUB_SCORE_KEYS[i] for i in np.flatnonzero(scores >= 70)]
         if strengths:
             explanation += f"Strengths: {', '.join(strengths)}. "
         
         # Highlight weaknesses
-        weaknesses = [key for key, value in sub_scores.items() if value['score'] < 50]
+        weaknesses = [SUB_SCORE_KEYS[i] for i in np.flatnonzero(scores < 50)]
         if weaknesses:
             explanation += f"Areas for improvement: {', '.join(weaknesses)}. "
         
@@ -234,24 +301,9 @@ class HealthScoreCalculator:
         
         return explanation
     
-    def _generate_recommendations(self, sub_scores: Dict, metrics: Dict) -> List[str]:
+    def _generate_recommendations(self, scores: np.ndarray, metrics: Dict) -> List[str]:
         """Generate actionable recommendations"""
-        recommendations = []
-        
-        if sub_scores['savingsRate']['score'] < 60:
-            recommendations.append("Increase your savings rate. Aim for at least 20% of income.")
-        
-        if sub_scores['spendingVolatility']['score'] < 60:
-            recommendations.append("Reduce spending volatility. Try to maintain consistent daily spending patterns.")
-        
-        if sub_scores['incomeToExpenseRatio']['score'] < 60:
-            recommendations.append("Your expenses are high relative to income. Consider reducing discretionary spending.")
-        
-        if sub_scores['budgetAdherence']['score'] < 60:
-            recommendations.append("Improve budget adherence. Track spending against your budget categories.")
-        
-        if sub_scores['anomalyScore']['score'] < 60:
-            recommendations.append("Review unusual transactions. Some spending patterns may need attention.")
+        recommendations = [LOW_SCORE_RECOMMENDATIONS[i] for i in np.flatnonzero(scores < 60)]
         
         if not recommendations:
             recommendations.append("Keep up the good work! Your financial health is on track.")
@@ -3,13 +3,22 @@ Insights generation service
 Generates explainable, data-driven insights and nudges
 """
 import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.services.cache import LRUCache
+from app.services.preprocessing import PreparedTransactions, fingerprint, prepare_frame
 import logging
 
 logger = logging.getLogger(__name__)
 
+WEEK = np.timedelta64(7, 'D')
+
+# Insight text templates, filled with str.format_map
+SPENDING_INCREASE_MESSAGE = 'Your spending increased by {increase:.1f}% compared to last week. This week: ${recent_total:.2f} vs last week: ${previous_total:.2f}.'
+CONCENTRATION_TITLE = 'High Spending in {category}'
+CONCENTRATION_MESSAGE = '{category} accounts for {percentage:.1f}% of your total expenses (${amount:.2f}). Consider diversifying spending or reviewing this category.'
+SAVINGS_MESSAGE = 'Your current savings rate is {savings_rate:.1f}%. By reducing expenses by ${potential_savings:.2f} per month, you could reach a 10% savings rate.'
+HEALTH_MESSAGE = 'Your financial health score is {overall_score:.1f}/100. Focus on improving savings rate and reducing spending volatility.'
+
 
 class InsightsGenerator:
     """
@@ -17,7 +26,14 @@ class InsightsGenerator:
     All insights are evidence-based and explainable
     """
     
-    def generate(self, transactions: List[Dict], profile: Dict, health_score: Dict = None) -> Dict[str, Any]:
+    def __init__(self):
+        self._result_cache = LRUCache(maxsize=256)
+    
+    def clear_cache(self):
+        """Drop memoized insights"""
+        self._result_cache.clear()
+    
+    def generate(self, transactions: List[Dict], profile: Dict, health_score: Dict = None, prepared: Optional[PreparedTransactions] = None) -> Dict[str, Any]:
         """
         Generate insights and nudges
         
@@ -25,6 +41,7 @@ class InsightsGenerator:
             transactions: List of transaction dictionaries
             profile: User profile
             health_score: Optional health score data
+            prepared: Optional frame from prepare_frame(transactions)
         
         Returns:
             Dictionary with insights
@@ -32,32 +49,48 @@ class InsightsGenerator:
         if len(transactions) < 10:
             return {'insights': []}
         
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
+        # Insights depend only on the history, income and overall score, so repeat requests are memoized
+        transactions_key = fingerprint(transactions)
+        overall_score = health_score.get('overallScore', 0) if health_score else None
+        cache_key = (transactions_key, profile.get('monthlyIncome', 0), overall_score)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if prepared is None:
+            prepared = prepare_frame(transactions, key=transactions_key)
         
         insights = []
         
         # Analyze spending trends
-        expense_df = df[df['type'] == 'expense']
-        income_df = df[df['type'] == 'income']
+        expense_amounts = prepared.amounts[prepared.is_expense]
+        expense_dates = prepared.dates[prepared.is_expense]
+        expense_count = len(expense_amounts)
         
         # Insight 1: Spending trend
-        if len(expense_df) >= 14:
-            recent_week = expense_df[expense_df['date'] >= (df['date'].max() - timedelta(days=7))]
-            previous_week = expense_df[
-                (expense_df['date'] >= (df['date'].max() - timedelta(days=14))) &
-                (expense_df['date'] < (df['date'].max() - timedelta(days=7)))
-            ]
+        if expense_count >= 14:
+            # Bucket 0 is the last 7 days before the latest transaction, bucket 1 the 7 before that
+            expense_age = prepared.dates.max() - expense_dates
+            week_bucket = np.where(expense_age <= WEEK, 0, np.where(expense_age <= 2 * WEEK, 1, -1))
+            in_window = week_bucket >= 0
+            window_buckets = week_bucket[in_window]
+            window_amounts = expense_amounts[in_window]
+            week_counts = np.bincount(window_buckets, minlength=2)
+            week_totals = np.bincount(window_buckets, weights=window_amounts, minlength=2)
             
-            if len(recent_week) > 0 and len(previous_week) > 0:
-                recent_total = recent_week['amount'].sum()
-                previous_total = previous_week['amount'].sum()
+            if week_counts[0] > 0 and week_counts[1] > 0:
+                recent_total, previous_total = week_totals
                 
                 if recent_total > previous_total * 1.2:
+                    context = {
+                        'increase': (recent_total / previous_total - 1) * 100,
+                        'recent_total': recent_total,
+                        'previous_total': previous_total
+                    }
                     insights.append({
                         'type': 'spending_increase',
                         'title': 'Spending Increase Detected',
-                        'message': f'Your spending increased by {((recent_total/previous_total - 1) * 100):.1f}% compared to last week. This week: ${recent_total:.2f} vs last week: ${previous_total:.2f}.',
+                        'message': SPENDING_INCREASE_MESSAGE.format_map(context),
                         'evidence': [
                             {'metric': 'this_week_spending', 'value': recent_total, 'explanation': 'Total spending this week'},
                             {'metric': 'last_week_spending', 'value': previous_total, 'explanation': 'Total spending last week'}
@@ -67,18 +100,20 @@ class InsightsGenerator:
                     })
         
         # Insight 2: Category analysis
-        category_totals = expense_df.groupby('category')['amount'].sum().sort_values(ascending=False)
-        if len(category_totals) > 0:
-            top_category = category_totals.index[0]
-            top_amount = category_totals.iloc[0]
-            total_expenses = expense_df['amount'].sum()
+        totals = prepared.expense_category_totals
+        if len(totals) > 0 and np.isfinite(totals.max()):
+            top_code = int(totals.argmax())
+            top_category = prepared.categories[top_code]
+            top_amount = totals[top_code]
+            total_expenses = prepared.total_expenses
             category_percentage = (top_amount / total_expenses * 100) if total_expenses > 0 else 0
             
             if category_percentage > 40:
+                context = {'category': top_category, 'percentage': category_percentage, 'amount': top_amount}
                 insights.append({
                     'type': 'category_concentration',
-                    'title': f'High Spending in {top_category}',
-                    'message': f'{top_category} accounts for {category_percentage:.1f}% of your total expenses (${top_amount:.2f}). Consider diversifying spending or reviewing this category.',
+                    'title': CONCENTRATION_TITLE.format_map(context),
+                    'message': CONCENTRATION_MESSAGE.format_map(context),
                     'evidence': [
                         {'metric': 'category', 'value': top_category, 'explanation': 'Top spending category'},
                         {'metric': 'category_percentage', 'value': category_percentage, 'explanation': 'Percentage of total expenses'},
@@ -89,10 +124,10 @@ class InsightsGenerator:
                 })
         
         # Insight 3: Savings opportunity
-        if len(income_df) > 0 and len(expense_df) > 0:
+        if prepared.is_income.any() and expense_count > 0:
             monthly_income = profile.get('monthlyIncome', 0)
             if monthly_income > 0:
-                avg_monthly_expenses = expense_df.groupby(expense_df['date'].dt.to_period('M'))['amount'].sum().mean()
+                avg_monthly_expenses = prepared.avg_monthly_expenses
                 current_savings = monthly_income - avg_monthly_expenses
                 savings_rate = (current_savings / monthly_income * 100) if monthly_income > 0 else 0
                 
@@ -101,7 +136,7 @@ class InsightsGenerator:
                     insights.append({
                         'type': 'savings_opportunity',
                         'title': 'Savings Opportunity',
-                        'message': f'Your current savings rate is {savings_rate:.1f}%. By reducing expenses by ${potential_savings:.2f} per month, you could reach a 10% savings rate.',
+                        'message': SAVINGS_MESSAGE.format_map({'savings_rate': savings_rate, 'potential_savings': potential_savings}),
                         'evidence': [
                             {'metric': 'current_savings_rate', 'value': savings_rate, 'explanation': 'Current monthly savings rate'},
                             {'metric': 'monthly_income', 'value': monthly_income, 'explanation': 'Monthly income'},
@@ -118,7 +153,7 @@ class InsightsGenerator:
                 insights.append({
                     'type': 'health_score',
                     'title': 'Financial Health Needs Attention',
-                    'message': f'Your financial health score is {overall_score:.1f}/100. Focus on improving savings rate and reducing spending volatility.',
+                    'message': HEALTH_MESSAGE.format_map({'overall_score': overall_score}),
                     'evidence': [
                         {'metric': 'health_score', 'value': overall_score, 'explanation': 'Overall financial health score'}
                     ],
@@ -126,7 +161,9 @@ class InsightsGenerator:
                     'actionable': True
                 })
         
-        return {'insights': insights}
+        result = {'insights': insights}
+        self._result_cache.put(cache_key, result)
+        return result
 
 
 # Singleton instance
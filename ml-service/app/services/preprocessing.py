@@ -0,0 +1,157 @@
+"""
+Transaction preprocessing helpers
+Shared by the services that analyse transaction history
+"""
+import hashlib
+import numpy as np
+import orjson
+import pandas as pd
+from typing import List, Dict, NamedTuple, Optional
+from app.services.cache import LRUCache
+
+
+class PreparedTransactions(NamedTuple):
+    """Column arrays of a transaction list, shared by the analysis services"""
+    amounts: np.ndarray
+    dates: np.ndarray
+    is_expense: np.ndarray
+    is_income: np.ndarray
+    category_codes: np.ndarray
+    categories: np.ndarray
+    # Aggregates every service reads, computed once with the columns
+    total_income: float
+    total_expenses: float
+    avg_monthly_expenses: float
+    expense_category_totals: np.ndarray
+
+
+# Prepared columns keyed by transaction fingerprint, shared by all services
+_prepared_cache = LRUCache(maxsize=128)
+
+
+def to_columnar(transactions: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Extract the columns the analysis services use into plain numpy arrays
+    Cheaper than building a DataFrame for typical request sizes
+
+    Args:
+        transactions: List of transaction dictionaries
+
+    Returns:
+        Dictionary with 'amount' (float64), 'date' (naive datetime64[ns]) and
+        'category' (object) arrays; tz-aware dates keep their wall-clock time
+    """
+    amounts = np.fromiter((t['amount'] for t in transactions), dtype=np.float64, count=len(transactions))
+    dates = pd.DatetimeIndex(pd.to_datetime([t['date'] for t in transactions]))
+    categories = np.array([t['category'] for t in transactions], dtype=object)
+
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    return {
+        'amount': amounts,
+        'date': dates.to_numpy(dtype='datetime64[ns]'),
+        'category': categories
+    }
+
+
+def day_numbers(dates: np.ndarray) -> np.ndarray:
+    """
+    Calendar day of each naive datetime64 as an int64 count of days since the epoch
+    Dates from to_columnar keep their wall-clock time, so this matches .dt.date
+    """
+    return dates.astype('datetime64[D]').view('int64')
+
+
+def month_numbers(dates: np.ndarray) -> np.ndarray:
+    """Calendar month of each naive datetime64 as an int64 count of months since the epoch"""
+    return dates.astype('datetime64[M]').view('int64')
+
+
+def bucket_totals(keys: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Sum weights per distinct integer key, like groupby(keys).sum()
+    
+    Args:
+        keys: int64 bucket keys such as day_numbers() or month_numbers()
+        weights: Values to sum, aligned with keys
+    
+    Returns:
+        Totals of the occupied buckets in ascending key order
+    """
+    if len(keys) == 0:
+        return np.zeros(0)
+    
+    offsets = keys - keys.min()
+    totals = np.bincount(offsets, weights=weights)
+    return totals[np.bincount(offsets) > 0]
+
+
+def category_totals(codes: np.ndarray, weights: np.ndarray, n_categories: int) -> np.ndarray:
+    """
+    Sum weights per category code, like groupby('category').sum()
+    
+    Args:
+        codes: Category codes from prepare_frame, -1 for missing categories
+        weights: Values to sum, aligned with codes
+        n_categories: Number of category labels
+    
+    Returns:
+        One total per label; labels without rows are -inf so argmax skips them
+    """
+    present = codes >= 0
+    counts = np.bincount(codes[present], minlength=n_categories)
+    # Empty input makes bincount return int64, which cannot hold -inf
+    totals = np.bincount(codes[present], weights=weights[present], minlength=n_categories).astype(np.float64, copy=False)
+    totals[counts == 0] = -np.inf
+    return totals
+
+
+def fingerprint(transactions: List[Dict]) -> bytes:
+    """Digest of the full transaction list, stable across equal request payloads"""
+    return hashlib.blake2b(orjson.dumps(transactions, default=str), digest_size=16).digest()
+
+
+def prepare_frame(transactions: List[Dict], key: Optional[bytes] = None) -> PreparedTransactions:
+    """
+    Extract (or fetch from cache) the columns the analysis services share
+    
+    Args:
+        transactions: List of transaction dictionaries
+        key: fingerprint(transactions), when the caller has already computed it
+    
+    Returns:
+        PreparedTransactions; callers must treat the arrays as read-only
+    """
+    if key is None:
+        key = fingerprint(transactions)
+    prepared = _prepared_cache.get(key)
+    if prepared is not None:
+        return prepared
+    
+    # Struct-of-arrays straight from the dicts; no DataFrame is built
+    columns = to_columnar(transactions)
+    count = len(transactions)
+    # Sorted labels so code order matches a groupby('category') index
+    category_codes, categories = pd.factorize(columns['category'], sort=True)
+    amounts = columns['amount']
+    is_expense = np.fromiter((t['type'] == 'expense' for t in transactions), dtype=bool, count=count)
+    is_income = np.fromiter((t['type'] == 'income' for t in transactions), dtype=bool, count=count)
+    
+    expense_amounts = amounts[is_expense]
+    monthly_expenses = bucket_totals(month_numbers(columns['date'][is_expense]), expense_amounts)
+    
+    prepared = PreparedTransactions(
+        amounts=amounts,
+        dates=columns['date'],
+        is_expense=is_expense,
+        is_income=is_income,
+        category_codes=category_codes,
+        categories=categories,
+        total_income=amounts[is_income].sum(),
+        total_expenses=expense_amounts.sum(),
+        avg_monthly_expenses=monthly_expenses.mean() if len(monthly_expenses) > 0 else 0.0,
+        expense_category_totals=category_totals(category_codes[is_expense], expense_amounts, len(categories))
+    )
+    _prepared_cache.put(key, prepared)
+    return prepared
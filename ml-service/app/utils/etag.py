@@ -0,0 +1,33 @@
+"""
+ETag helpers
+Strong validators for conditional GET/POST handling
+"""
+import hashlib
+from fastapi import Response
+from typing import Optional
+
+
+def etag_for_bytes(body: bytes) -> str:
+    """Return a quoted strong ETag for a rendered response body"""
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_for_parts(*parts) -> str:
+    """Return a quoted strong ETag derived from the inputs of a deterministic response"""
+    return etag_for_bytes("|".join(str(part) for part in parts).encode())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    
+    if if_none_match.strip() == '*':
+        return True
+    
+    return etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+
+
+def not_modified(etag: str) -> Response:
+    """Build an empty 304 response carrying the ETag"""
+    return Response(status_code=304, headers={'ETag': etag})
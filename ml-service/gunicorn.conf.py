@@ -0,0 +1,13 @@
+"""
+Gunicorn configuration for production
+Usage: gunicorn app.main:app -c gunicorn.conf.py
+"""
+from app.config import settings
+
+bind = f"{settings.HOST}:{settings.PORT}"
+
+# One worker per core; each worker runs its own event loop (uvloop + httptools)
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+
+loglevel = settings.LOG_LEVEL.lower()
@@ -5,10 +5,18 @@ import uvicorn
 from app.config import settings
 
 if __name__ == "__main__":
+    reload = settings.ENVIRONMENT == "development"
+    
+    # uvloop/httptools for served processes; the reloader keeps uvicorn's defaults
+    server_options = {} if reload else {"loop": "uvloop", "http": "httptools"}
+    
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=(settings.ENVIRONMENT == "development"),
-        log_level=settings.LOG_LEVEL.lower()
+        reload=reload,
+        # Reload mode only supports a single process
+        workers=1 if reload else settings.WORKERS,
+        log_level=settings.LOG_LEVEL.lower(),
+        **server_options
     )